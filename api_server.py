@@ -14,7 +14,7 @@ import threading
 import random
 import mimetypes
 from datetime import datetime
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 import uvicorn
 import requests
@@ -32,8 +32,8 @@ from modules.file_uploader import upload_to_file_bed
 
 # --- Dashboard 集成 ---
 try:
-    from database import DashboardDatabase
-    dashboard_db = DashboardDatabase()
+    from database import get_db
+    dashboard_db = get_db()
     DASHBOARD_ENABLED = True
     logger.info("✅ Dashboard database integration enabled")
 except ImportError:
@@ -422,9 +422,16 @@ async def lifespan(app: FastAPI):
         idle_monitor_thread = threading.Thread(target=idle_monitor, daemon=True)
         idle_monitor_thread.start()
         
+    # Periodically flush buffered dashboard usage logs to disk
+    dashboard_flusher = asyncio.create_task(dashboard_db.run_flusher()) if DASHBOARD_ENABLED else None
 
     yield
     logger.info("服务器正在关闭。")
+    if dashboard_flusher:
+        dashboard_flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await dashboard_flusher
+        await dashboard_db.close()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -1207,7 +1214,7 @@ async def chat_completions(request: Request):
             client_ip = request.client.host if request.client else "unknown"
             
             try:
-                dashboard_db.log_usage(user_token, model_name or "unknown", estimated_tokens, client_ip)
+                await dashboard_db.log_usage(user_token, model_name or "unknown", estimated_tokens, client_ip)
             except Exception as e:
                 logger.warning(f"Failed to log usage to dashboard: {e}")
 
@@ -0,0 +1,293 @@
+"""
+Shared LMArena Bridge Dashboard routes
+Admin login/session handling, token management and statistics API,
+included by both dashboard_server.py and integrated_server.py
+"""
+
+import logging
+import os
+import secrets
+import time
+from typing import Optional
+from dotenv import load_dotenv
+from jinja2 import FileSystemBytecodeCache
+
+from fastapi import APIRouter, Request, HTTPException, Depends, Form, Cookie, Query
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, ORJSONResponse
+from fastapi.templating import Jinja2Templates
+
+from database import DashboardDatabase, format_timestamp, get_db, get_token_id
+from modules.response_cache import cached_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+# Dashboard JSON endpoints are serialized with orjson when it is installed
+JSONResponseClass = ORJSONResponse if orjson is not None else JSONResponse
+
+router = APIRouter(default_response_class=JSONResponseClass)
+
+# Templates (parsed once per process, compiled bytecode cached across restarts
+# in Jinja's per-user temp directory, which it creates with mode 0700)
+templates = Jinja2Templates(directory="templates")
+templates.env.filters["timestamp"] = format_timestamp
+templates.env.auto_reload = False
+templates.env.bytecode_cache = FileSystemBytecodeCache()
+
+# Session storage: Redis when REDIS_URL is configured (shared across processes,
+# expired by Redis itself), otherwise in-memory
+SESSION_TTL = 86400
+REDIS_URL = os.getenv("REDIS_URL")
+redis_client = None
+if REDIS_URL and aioredis is not None:
+    redis_client = aioredis.Redis.from_url(REDIS_URL, decode_responses=True)
+elif REDIS_URL:
+    logger.warning("⚠️ REDIS_URL is set but the redis package is not installed; using in-memory sessions")
+sessions = {}
+
+# Statistics endpoints are polled often, so their responses are cached briefly
+STATS_CACHE_TTL = 1.0
+
+# Tokens shown per page in the admin panel
+ADMIN_PAGE_SIZE = 50
+
+# Admin credentials
+ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "change_this_secure_password")
+SECRET_KEY = os.getenv("SECRET_KEY", secrets.token_urlsafe(32))
+
+async def create_session(username: str) -> str:
+    """Create a new session"""
+    session_id = secrets.token_urlsafe(32)
+    if redis_client is not None:
+        await redis_client.set(f"sess:{session_id}", username, ex=SESSION_TTL)
+        return session_id
+    
+    sessions[session_id] = {
+        "username": username,
+        "expires_at": time.monotonic() + SESSION_TTL
+    }
+    return session_id
+
+async def get_session_user(session_id: Optional[str]) -> Optional[str]:
+    """Return the username of a valid session, or None"""
+    if not session_id:
+        return None
+    if redis_client is not None:
+        return await redis_client.get(f"sess:{session_id}")
+    
+    session = sessions.get(session_id)
+    if session is None or time.monotonic() > session["expires_at"]:
+        sessions.pop(session_id, None)
+        return None
+    
+    return session["username"]
+
+async def delete_session(session_id: Optional[str]):
+    """Delete a session"""
+    if not session_id:
+        return
+    if redis_client is not None:
+        await redis_client.delete(f"sess:{session_id}")
+    else:
+        sessions.pop(session_id, None)
+
+async def get_current_user(session_id: Optional[str] = Cookie(None)):
+    """Dependency to get current user"""
+    username = await get_session_user(session_id)
+    if username is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return username
+
+def invalidate_stats_cache():
+    """Drop cached statistics after a token change"""
+    get_stats.cache_clear()
+    health_check.cache_clear()
+
+@router.get("/admin/login", response_class=HTMLResponse)
+async def admin_login_page(request: Request):
+    """Admin login page"""
+    return templates.TemplateResponse("admin_login.html", {
+        "request": request
+    })
+
+@router.post("/admin/login")
+async def admin_login(
+    username: str = Form(...),
+    password: str = Form(...)
+):
+    """Handle admin login"""
+    # Constant-time comparison; "&" so both checks always run
+    username_ok = secrets.compare_digest(username.encode(), ADMIN_USERNAME.encode())
+    password_ok = secrets.compare_digest(password.encode(), ADMIN_PASSWORD.encode())
+    if username_ok & password_ok:
+        session_id = await create_session(username)
+        response = RedirectResponse(url="/admin", status_code=303)
+        response.set_cookie(
+            key="session_id",
+            value=session_id,
+            httponly=True,
+            max_age=SESSION_TTL,
+            samesite="lax"
+        )
+        return response
+    
+    raise HTTPException(status_code=401, detail="Invalid credentials")
+
+@router.get("/admin/logout")
+async def admin_logout(session_id: Optional[str] = Cookie(None)):
+    """Handle admin logout"""
+    await delete_session(session_id)
+    
+    response = RedirectResponse(url="/admin/login", status_code=303)
+    response.delete_cookie("session_id")
+    return response
+
+@router.get("/admin", response_class=HTMLResponse)
+async def admin_panel(
+    request: Request,
+    page: int = 1,
+    username: str = Depends(get_current_user),
+    db: DashboardDatabase = Depends(get_db)
+):
+    """Admin panel - token management"""
+    total_pages = max(1, (db.get_token_count() + ADMIN_PAGE_SIZE - 1) // ADMIN_PAGE_SIZE)
+    page = min(max(page, 1), total_pages)
+    tokens = db.get_all_tokens(offset=(page - 1) * ADMIN_PAGE_SIZE, limit=ADMIN_PAGE_SIZE)
+    stats = db.get_global_stats()
+    
+    return templates.TemplateResponse("admin.html", {
+        "request": request,
+        "tokens": tokens,
+        "stats": stats,
+        "username": username,
+        "page": page,
+        "total_pages": total_pages
+    })
+
+@router.post("/admin/token/create")
+async def create_token(
+    user_name: str = Form(""),
+    user_email: str = Form(""),
+    username: str = Depends(get_current_user),
+    db: DashboardDatabase = Depends(get_db)
+):
+    """Create a new token"""
+    user_info = {}
+    if user_name:
+        user_info["name"] = user_name
+    if user_email:
+        user_info["email"] = user_email
+    
+    token = await db.generate_token(user_info)
+    invalidate_stats_cache()
+    return JSONResponse({"success": True, "token": token})
+
+@router.post("/admin/token/{token_id}/revoke")
+async def revoke_token(
+    token_id: str,
+    username: str = Depends(get_current_user),
+    db: DashboardDatabase = Depends(get_db)
+):
+    """Revoke a token"""
+    success = await db.revoke_token(token_id)
+    invalidate_stats_cache()
+    return JSONResponse({"success": success})
+
+@router.post("/admin/token/{token_id}/activate")
+async def activate_token(
+    token_id: str,
+    username: str = Depends(get_current_user),
+    db: DashboardDatabase = Depends(get_db)
+):
+    """Activate a token"""
+    success = await db.activate_token(token_id)
+    invalidate_stats_cache()
+    return JSONResponse({"success": success})
+
+@router.post("/admin/token/{token_id}/delete")
+async def delete_token(
+    token_id: str,
+    username: str = Depends(get_current_user),
+    db: DashboardDatabase = Depends(get_db)
+):
+    """Delete a token"""
+    success = await db.delete_token(token_id)
+    invalidate_stats_cache()
+    return JSONResponse({"success": success})
+
+@router.get("/api/stats")
+@cached_response(STATS_CACHE_TTL, JSONResponseClass)
+async def get_stats(db: DashboardDatabase = Depends(get_db)):
+    """Get global statistics"""
+    return db.get_global_stats()
+
+@router.get("/api/token/{token}/info")
+async def get_token_info(
+    token: str,
+    db: DashboardDatabase = Depends(get_db)
+):
+    """Get token information (public endpoint for users to check their token)"""
+    token_info = db.get_token_info(token)
+    
+    if not token_info:
+        raise HTTPException(status_code=404, detail="Token not found")
+    
+    # Return sanitized info (without the actual key)
+    return {
+        "created_at": token_info["created_at"],
+        "last_used": token_info["last_used"],
+        "is_active": token_info["is_active"],
+        "usage_stats": token_info["usage_stats"]
+    }
+
+@router.get("/api/usage/timeline")
+async def get_usage_timeline(
+    days: int = 7,
+    token: Optional[str] = None,
+    db: DashboardDatabase = Depends(get_db)
+):
+    """Get usage timeline for charts"""
+    token_id = None
+    if token:
+        token_id = get_token_id(token)
+    
+    timeline = db.get_usage_timeline(token_id, days)
+    return timeline
+
+@router.get("/api/admin/tokens")
+async def get_all_tokens_api(
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=0),
+    username: str = Depends(get_current_user),
+    db: DashboardDatabase = Depends(get_db)
+):
+    """Get all tokens, optionally one page at a time (admin only)"""
+    return db.get_all_tokens(offset, limit)
+
+@router.get("/api/admin/recent-usage")
+async def get_recent_usage_api(
+    limit: int = 100,
+    username: str = Depends(get_current_user),
+    db: DashboardDatabase = Depends(get_db)
+):
+    """Get recent usage logs (admin only)"""
+    return db.get_recent_usage(limit)
+
+@router.get("/health")
+@cached_response(STATS_CACHE_TTL, JSONResponseClass)
+async def health_check(db: DashboardDatabase = Depends(get_db)):
+    """Health check endpoint"""
+    return {"status": "healthy", "active_tokens": db.get_active_token_count()}
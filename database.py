@@ -3,34 +3,220 @@ Database management for LMArena Bridge Dashboard
 Handles token storage, usage tracking, and statistics
 """
 
+import asyncio
+import atexit
 import json
 import os
 import secrets
 import hashlib
+import itertools
+import logging
+import time
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Dict, List, Optional
-import requests
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import aiohttp
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Usage logging marks the database dirty instead of rewriting the file on every
+# request; pending changes are flushed every FLUSH_INTERVAL seconds by
+# run_flusher(), or straight away once FLUSH_THRESHOLD changes have piled up.
+FLUSH_INTERVAL = 0.5
+FLUSH_THRESHOLD = 100
+
+# Number of usage log entries kept in memory
+MAX_USAGE_LOGS = 10000
+
+# Number of days of per-day usage aggregates kept for the usage timeline
+MAX_DAILY_STATS_DAYS = 90
+
+# Number of distinct IP addresses remembered per token
+MAX_TOKEN_IPS = 100
+
+# IP -> country lookups are cached; failed lookups are retried after a while
+GEO_CACHE_SIZE = 10000
+GEO_FAILURE_TTL = 300
+GEO_MAX_CONNECTIONS = 10
+
+def _dumps(obj, indent: bool = False) -> bytes:
+    """Serialize to JSON bytes, using orjson when available (deques are written as lists)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=list, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, default=list, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+def _loads(data: bytes):
+    """Parse JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+@lru_cache(maxsize=8192)
+def get_token_id(token: str) -> str:
+    """Derive the storage ID of a token (cached, since tokens are long-lived)"""
+    # Hex of the first 8 digest bytes; same value as hexdigest()[:16] without
+    # hex-encoding the whole digest
+    return hashlib.sha256(token.encode()).digest()[:8].hex()
+
+def _replace_file(path: str, data: bytes):
+    """Write a file via a temp file and os.replace, so readers never see a partial write"""
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_file, path)
+
+def _to_timestamp(value) -> Optional[int]:
+    """Convert an ISO 8601 string from older databases to unix seconds"""
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value).timestamp())
+    return value
+
+def _date_key(timestamp: float) -> str:
+    """Local calendar day of a unix timestamp, as used for daily_stats keys"""
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+def format_timestamp(timestamp: Optional[float], fmt: str = "%Y-%m-%d %H:%M:%S") -> str:
+    """Render a stored unix timestamp for display"""
+    if timestamp is None:
+        return "Never"
+    return time.strftime(fmt, time.localtime(timestamp))
 
 class DashboardDatabase:
+    """
+    Token and usage store kept in memory and persisted to JSON.
+    
+    Mutating methods are coroutines that hold an asyncio write lock, which also
+    covers the background flush. Read-only accessors are lock-free: they run on
+    the event loop and only do plain dict lookups, so they never observe a
+    half-applied write.
+    """
+    
     def __init__(self, db_file: str = "dashboard_data.json"):
         self.db_file = db_file
+        # Usage logs live in an append-only JSON Lines file next to the main
+        # database, so logging a request never rewrites the whole file
+        self.usage_log_file = os.path.splitext(db_file)[0] + "_usage.jsonl"
+        self._unsaved_logs = []
+        self._usage_log_lines = 0
+        self._dirty = False
+        self._pending_writes = 0
+        self._wlock = asyncio.Lock()
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._country_cache: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        # token_id -> set mirroring usage_stats["ip_addresses"], for O(1) membership checks
+        self._ip_sets: Dict[str, set] = {}
         self.data = self._load_data()
+        atexit.register(self.flush)
     
     def _load_data(self) -> Dict:
         """Load database from JSON file or create new if doesn't exist"""
-        if os.path.exists(self.db_file):
-            try:
-                with open(self.db_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return self._create_empty_db()
-        return self._create_empty_db()
+        if not os.path.exists(self.db_file):
+            return self._create_empty_db()
+        try:
+            with open(self.db_file, 'rb') as f:
+                data = _loads(f.read())
+        except ValueError:
+            return self._create_empty_db()
+        
+        if "usage_logs" in data:
+            # Older databases kept the logs inline; move them to the log file
+            # and drop them from the main file on the next save
+            data["usage_logs"] = deque(data["usage_logs"], maxlen=MAX_USAGE_LOGS)
+            self._write_usage_log(data["usage_logs"])
+            self._dirty = True
+        else:
+            data["usage_logs"] = self._load_usage_logs()
+        
+        # Timestamps used to be stored as ISO 8601 strings
+        if self._upgrade_timestamps(data):
+            self._write_usage_log(data["usage_logs"])
+            self._dirty = True
+        
+        if "daily_stats" not in data:
+            data["daily_stats"] = self._build_daily_stats(data["usage_logs"])
+            self._dirty = True
+        
+        for token_data in data["tokens"].values():
+            usage_stats = token_data["usage_stats"]
+            usage_stats["ip_addresses"] = deque(usage_stats["ip_addresses"], maxlen=MAX_TOKEN_IPS)
+        return data
+    
+    def _upgrade_timestamps(self, data: Dict) -> bool:
+        """Convert ISO timestamps to unix seconds in place; returns True if usage logs changed"""
+        for token_data in data["tokens"].values():
+            if isinstance(token_data["created_at"], str) or isinstance(token_data["last_used"], str):
+                token_data["created_at"] = _to_timestamp(token_data["created_at"])
+                token_data["last_used"] = _to_timestamp(token_data["last_used"])
+                self._dirty = True
+        
+        logs_changed = False
+        for log in data["usage_logs"]:
+            if isinstance(log["timestamp"], str):
+                log["timestamp"] = _to_timestamp(log["timestamp"])
+                logs_changed = True
+        return logs_changed
+    
+    def _load_usage_logs(self) -> deque:
+        """Load the most recent usage logs from the usage log file"""
+        logs = deque(maxlen=MAX_USAGE_LOGS)
+        if not os.path.exists(self.usage_log_file):
+            return logs
+        line_count = 0
+        with open(self.usage_log_file, 'rb') as f:
+            for line in f:
+                try:
+                    logs.append(_loads(line))
+                except ValueError:
+                    # Skip a partially written trailing line
+                    continue
+                line_count += 1
+        self._usage_log_lines = line_count
+        return logs
+    
+    def _write_usage_log(self, logs: Sequence[Dict]):
+        """Rewrite the usage log file with the given entries"""
+        _replace_file(self.usage_log_file, b"".join(_dumps(log) + b"\n" for log in logs))
+        self._usage_log_lines = len(logs)
+    
+    def _build_daily_stats(self, logs: Iterable[Dict]) -> Dict:
+        """Rebuild per-day aggregates from usage logs (for databases that predate them)"""
+        daily_stats = {}
+        for log in sorted(logs, key=lambda log: log["timestamp"]):
+            self._add_daily_usage(daily_stats, log["timestamp"], log["token_id"], log["tokens"])
+        return daily_stats
+    
+    @staticmethod
+    def _add_daily_usage(daily_stats: Dict, timestamp: float, token_id: str, tokens_used: int):
+        """Count one request in the per-day aggregates"""
+        date_key = _date_key(timestamp)
+        day = daily_stats.get(date_key)
+        if day is None:
+            # Days are added in date order, so expired ones are at the front
+            cutoff = _date_key(timestamp - MAX_DAILY_STATS_DAYS * 86400)
+            while daily_stats and next(iter(daily_stats)) < cutoff:
+                del daily_stats[next(iter(daily_stats))]
+            day = daily_stats[date_key] = {"requests": 0, "tokens": 0, "per_token": {}}
+        day["requests"] += 1
+        day["tokens"] += tokens_used
+        
+        token_day = day["per_token"].get(token_id)
+        if token_day is None:
+            token_day = day["per_token"][token_id] = {"requests": 0, "tokens": 0}
+        token_day["requests"] += 1
+        token_day["tokens"] += tokens_used
     
     def _create_empty_db(self) -> Dict:
         """Create empty database structure"""
         return {
             "tokens": {},
-            "usage_logs": [],
+            "usage_logs": deque(maxlen=MAX_USAGE_LOGS),
+            "daily_stats": {},
             "stats": {
                 "total_requests": 0,
                 "total_tokens": 0,
@@ -38,38 +224,118 @@ class DashboardDatabase:
             }
         }
     
+    def _snapshot(self) -> Tuple[bytes, bytes, bool, int]:
+        """Serialize pending changes: (main file, usage log lines, whether the log file is rewritten, log line count after the write)"""
+        rewrite_log = bool(self._unsaved_logs) and \
+            self._usage_log_lines + len(self._unsaved_logs) > 2 * MAX_USAGE_LOGS
+        if rewrite_log:
+            # Compact the log file down to what is kept in memory
+            logs = self.data["usage_logs"]
+            log_lines = len(logs)
+        else:
+            logs = self._unsaved_logs
+            log_lines = self._usage_log_lines + len(logs)
+        log_data = b"".join(_dumps(log) + b"\n" for log in logs)
+        
+        data = _dumps({k: v for k, v in self.data.items() if k != "usage_logs"}, indent=True)
+        return data, log_data, rewrite_log, log_lines
+    
+    def _write_log_data(self, log_data: bytes, rewrite_log: bool):
+        """Append new usage log lines, or replace the log file when compacting"""
+        if rewrite_log:
+            _replace_file(self.usage_log_file, log_data)
+        elif log_data:
+            with open(self.usage_log_file, 'ab') as f:
+                f.write(log_data)
+    
     def _save_data(self):
         """Save database to JSON file"""
-        with open(self.db_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        data, log_data, rewrite_log, log_lines = self._snapshot()
+        self._write_log_data(log_data, rewrite_log)
+        self._unsaved_logs = []
+        self._usage_log_lines = log_lines
+        _replace_file(self.db_file, data)
+        self._dirty = False
+        self._pending_writes = 0
+    
+    async def _write_snapshot(self, snapshot: Tuple[bytes, bytes, bool, int]):
+        """Write a snapshot from worker threads; pending state is only cleared once it is on disk"""
+        data, log_data, rewrite_log, log_lines = snapshot
+        await asyncio.to_thread(self._write_log_data, log_data, rewrite_log)
+        # The new log lines are on disk; if the main file fails below,
+        # the retry must not append them a second time
+        self._unsaved_logs = []
+        self._usage_log_lines = log_lines
+        await asyncio.to_thread(_replace_file, self.db_file, data)
+        self._dirty = False
+        self._pending_writes = 0
+    
+    async def _save_data_locked(self):
+        """Save database without blocking the event loop; caller must hold the write lock"""
+        # The snapshot is taken on the event loop, so it is consistent; only
+        # the file I/O runs in worker threads
+        write = asyncio.ensure_future(self._write_snapshot(self._snapshot()))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            # Finish the write before the lock is released
+            await write
+            raise
+    
+    def flush(self):
+        """Write pending changes to disk, if any"""
+        if self._dirty:
+            self._save_data()
+    
+    async def run_flusher(self, interval: float = FLUSH_INTERVAL):
+        """Background task that periodically flushes pending changes"""
+        while True:
+            await asyncio.sleep(interval)
+            if self._dirty:
+                try:
+                    async with self._wlock:
+                        await self._save_data_locked()
+                except Exception as e:
+                    # The changes stay pending and are retried on the next tick
+                    logger.error(f"Failed to save dashboard database: {e}")
     
-    def generate_token(self, user_info: Optional[Dict] = None) -> str:
+    async def close(self):
+        """Flush pending changes and release the shared HTTP session"""
+        async with self._wlock:
+            if self._dirty:
+                await self._save_data_locked()
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+    
+    async def generate_token(self, user_info: Optional[Dict] = None) -> str:
         """Generate a new API token"""
-        token = f"lma_{secrets.token_urlsafe(32)}"
-        token_id = hashlib.sha256(token.encode()).hexdigest()[:16]
-        
-        self.data["tokens"][token_id] = {
-            "key": token,
-            "created_at": datetime.now().isoformat(),
-            "last_used": None,
-            "is_active": True,
-            "user_info": user_info or {},
-            "usage_stats": {
-                "total_requests": 0,
-                "total_tokens": 0,
-                "models_used": {},
-                "ip_addresses": [],
-                "countries": {}
+        async with self._wlock:
+            token = f"lma_{secrets.token_urlsafe(32)}"
+            token_id = get_token_id(token)
+            
+            self.data["tokens"][token_id] = {
+                "key": token,
+                "created_at": int(time.time()),
+                "last_used": None,
+                "is_active": True,
+                "user_info": user_info or {},
+                "usage_stats": {
+                    "total_requests": 0,
+                    "total_tokens": 0,
+                    "models_used": {},
+                    "ip_addresses": deque(maxlen=MAX_TOKEN_IPS),
+                    "countries": {}
+                }
             }
-        }
-        
-        self.data["stats"]["active_tokens"] += 1
-        self._save_data()
-        return token
+            
+            self.data["stats"]["active_tokens"] += 1
+            await self._save_data_locked()
+            return token
     
     def get_token_info(self, token: str) -> Optional[Dict]:
         """Get token information by token string"""
-        token_id = hashlib.sha256(token.encode()).hexdigest()[:16]
+        token_id = get_token_id(token)
         return self.data["tokens"].get(token_id)
     
     def get_token_by_id(self, token_id: str) -> Optional[Dict]:
@@ -81,105 +347,158 @@ class DashboardDatabase:
         token_info = self.get_token_info(token)
         return token_info is not None and token_info.get("is_active", False)
     
-    def revoke_token(self, token_id: str) -> bool:
+    async def revoke_token(self, token_id: str) -> bool:
         """Revoke a token"""
-        if token_id in self.data["tokens"]:
-            if self.data["tokens"][token_id]["is_active"]:
-                self.data["stats"]["active_tokens"] -= 1
-            self.data["tokens"][token_id]["is_active"] = False
-            self._save_data()
-            return True
-        return False
+        async with self._wlock:
+            if token_id in self.data["tokens"]:
+                if self.data["tokens"][token_id]["is_active"]:
+                    self.data["stats"]["active_tokens"] -= 1
+                self.data["tokens"][token_id]["is_active"] = False
+                await self._save_data_locked()
+                return True
+            return False
     
-    def activate_token(self, token_id: str) -> bool:
+    async def activate_token(self, token_id: str) -> bool:
         """Activate a token"""
-        if token_id in self.data["tokens"]:
-            if not self.data["tokens"][token_id]["is_active"]:
-                self.data["stats"]["active_tokens"] += 1
-            self.data["tokens"][token_id]["is_active"] = True
-            self._save_data()
-            return True
-        return False
+        async with self._wlock:
+            if token_id in self.data["tokens"]:
+                if not self.data["tokens"][token_id]["is_active"]:
+                    self.data["stats"]["active_tokens"] += 1
+                self.data["tokens"][token_id]["is_active"] = True
+                await self._save_data_locked()
+                return True
+            return False
     
-    def delete_token(self, token_id: str) -> bool:
+    async def delete_token(self, token_id: str) -> bool:
         """Permanently delete a token"""
-        if token_id in self.data["tokens"]:
-            if self.data["tokens"][token_id]["is_active"]:
-                self.data["stats"]["active_tokens"] -= 1
-            del self.data["tokens"][token_id]
-            self._save_data()
-            return True
-        return False
+        async with self._wlock:
+            if token_id in self.data["tokens"]:
+                if self.data["tokens"][token_id]["is_active"]:
+                    self.data["stats"]["active_tokens"] -= 1
+                del self.data["tokens"][token_id]
+                self._ip_sets.pop(token_id, None)
+                for day in self.data["daily_stats"].values():
+                    day["per_token"].pop(token_id, None)
+                await self._save_data_locked()
+                return True
+            return False
     
-    def log_usage(self, token: str, model: str, tokens_used: int, ip: str):
+    async def log_usage(self, token: str, model: str, tokens_used: int, ip: str):
         """Log API usage"""
-        token_id = hashlib.sha256(token.encode()).hexdigest()[:16]
+        token_id = get_token_id(token)
         
         if token_id not in self.data["tokens"]:
             return
         
         # Get country from IP
-        country = self._get_country_from_ip(ip)
-        
-        # Update token stats
-        token_data = self.data["tokens"][token_id]
-        token_data["last_used"] = datetime.now().isoformat()
-        token_data["usage_stats"]["total_requests"] += 1
-        token_data["usage_stats"]["total_tokens"] += tokens_used
-        
-        # Track model usage
-        if model not in token_data["usage_stats"]["models_used"]:
-            token_data["usage_stats"]["models_used"][model] = 0
-        token_data["usage_stats"]["models_used"][model] += 1
-        
-        # Track IP addresses (keep last 100)
-        if ip not in token_data["usage_stats"]["ip_addresses"]:
-            token_data["usage_stats"]["ip_addresses"].append(ip)
-            if len(token_data["usage_stats"]["ip_addresses"]) > 100:
-                token_data["usage_stats"]["ip_addresses"].pop(0)
-        
-        # Track countries
-        if country:
-            if country not in token_data["usage_stats"]["countries"]:
-                token_data["usage_stats"]["countries"][country] = 0
-            token_data["usage_stats"]["countries"][country] += 1
+        country = await self._get_country_from_ip(ip)
+        now = int(time.time())
         
-        # Add to usage logs (keep last 10000)
-        self.data["usage_logs"].append({
-            "timestamp": datetime.now().isoformat(),
-            "token_id": token_id,
-            "model": model,
-            "tokens": tokens_used,
-            "ip": ip,
-            "country": country
-        })
-        
-        if len(self.data["usage_logs"]) > 10000:
-            self.data["usage_logs"] = self.data["usage_logs"][-10000:]
-        
-        # Update global stats
-        self.data["stats"]["total_requests"] += 1
-        self.data["stats"]["total_tokens"] += tokens_used
-        
-        self._save_data()
+        async with self._wlock:
+            token_data = self.data["tokens"].get(token_id)
+            if token_data is None:
+                # Deleted while the country lookup was in flight
+                return
+            
+            # Update token stats
+            token_data["last_used"] = now
+            token_data["usage_stats"]["total_requests"] += 1
+            token_data["usage_stats"]["total_tokens"] += tokens_used
+            
+            # Track model usage
+            if model not in token_data["usage_stats"]["models_used"]:
+                token_data["usage_stats"]["models_used"][model] = 0
+            token_data["usage_stats"]["models_used"][model] += 1
+            
+            # Track IP addresses (keep last MAX_TOKEN_IPS)
+            ip_addresses = token_data["usage_stats"]["ip_addresses"]
+            ip_set = self._ip_sets.get(token_id)
+            if ip_set is None:
+                ip_set = self._ip_sets[token_id] = set(ip_addresses)
+            if ip not in ip_set:
+                if len(ip_addresses) == ip_addresses.maxlen:
+                    ip_set.discard(ip_addresses[0])
+                ip_addresses.append(ip)
+                ip_set.add(ip)
+            
+            # Track countries
+            if country:
+                if country not in token_data["usage_stats"]["countries"]:
+                    token_data["usage_stats"]["countries"][country] = 0
+                token_data["usage_stats"]["countries"][country] += 1
+            
+            # Add to usage logs (the deque drops entries beyond MAX_USAGE_LOGS)
+            log_entry = {
+                "timestamp": now,
+                "token_id": token_id,
+                "model": model,
+                "tokens": tokens_used,
+                "ip": ip,
+                "country": country
+            }
+            self.data["usage_logs"].append(log_entry)
+            self._unsaved_logs.append(log_entry)
+            
+            # Update per-day aggregates used by the usage timeline
+            self._add_daily_usage(self.data["daily_stats"], now, token_id, tokens_used)
+            
+            # Update global stats
+            self.data["stats"]["total_requests"] += 1
+            self.data["stats"]["total_tokens"] += tokens_used
+            
+            self._dirty = True
+            self._pending_writes += 1
+            if self._pending_writes >= FLUSH_THRESHOLD:
+                await self._save_data_locked()
     
-    def _get_country_from_ip(self, ip: str) -> Optional[str]:
-        """Get country from IP address using ip-api.com"""
+    async def _get_country_from_ip(self, ip: str) -> Optional[str]:
+        """Get country from IP address using ip-api.com (cached per IP)"""
         if ip in ["127.0.0.1", "localhost", "::1"]:
             return "Local"
         
+        cached = self._country_cache.get(ip)
+        if cached is not None:
+            country, expires_at = cached
+            if expires_at is None or time.monotonic() < expires_at:
+                self._country_cache.move_to_end(ip)
+                return country
+        
+        country = None
         try:
-            response = requests.get(f"http://ip-api.com/json/{ip}?fields=country", timeout=2)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("country", "Unknown")
-        except:
+            if self._http is None:
+                # Keep-alive pool for ip-api.com; DNS answers are cached too
+                self._http = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit_per_host=GEO_MAX_CONNECTIONS, ttl_dns_cache=300)
+                )
+            async with self._http.get(
+                f"http://ip-api.com/json/{ip}?fields=country",
+                timeout=aiohttp.ClientTimeout(total=2)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    country = data.get("country", "Unknown")
+        except Exception:
             pass
-        return "Unknown"
+        
+        if country is None:
+            self._country_cache[ip] = ("Unknown", time.monotonic() + GEO_FAILURE_TTL)
+        else:
+            self._country_cache[ip] = (country, None)
+        self._country_cache.move_to_end(ip)
+        if len(self._country_cache) > GEO_CACHE_SIZE:
+            self._country_cache.popitem(last=False)
+        return country or "Unknown"
     
-    def get_all_tokens(self) -> Dict:
-        """Get all tokens"""
-        return self.data["tokens"]
+    def get_all_tokens(self, offset: int = 0, limit: Optional[int] = None) -> Dict:
+        """Get all tokens, or the page starting at offset when a limit is given"""
+        if offset == 0 and limit is None:
+            return self.data["tokens"]
+        stop = None if limit is None else offset + limit
+        return dict(itertools.islice(self.data["tokens"].items(), offset, stop))
+    
+    def get_token_count(self) -> int:
+        """Get count of all tokens"""
+        return len(self.data["tokens"])
     
     def get_active_token_count(self) -> int:
         """Get count of active tokens"""
@@ -191,7 +510,9 @@ class DashboardDatabase:
     
     def get_recent_usage(self, limit: int = 100) -> List[Dict]:
         """Get recent usage logs"""
-        return self.data["usage_logs"][-limit:]
+        recent = list(itertools.islice(reversed(self.data["usage_logs"]), max(limit, 0)))
+        recent.reverse()
+        return recent
     
     def get_token_usage_by_model(self, token_id: str) -> Dict:
         """Get model usage breakdown for a token"""
@@ -207,24 +528,26 @@ class DashboardDatabase:
     
     def get_usage_timeline(self, token_id: Optional[str] = None, days: int = 7) -> List[Dict]:
         """Get usage timeline for charts"""
-        from datetime import timedelta
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
+        cutoff = _date_key(time.time() - days * 86400)
         
-        timeline = {}
-        for log in self.data["usage_logs"]:
-            log_date = datetime.fromisoformat(log["timestamp"])
-            if log_date < cutoff_date:
-                continue
+        # daily_stats is kept in date order, so walk back from the newest day
+        timeline = []
+        for date_key in reversed(self.data["daily_stats"]):
+            if date_key < cutoff:
+                break
             
-            if token_id and log["token_id"] != token_id:
-                continue
+            day = self.data["daily_stats"][date_key]
+            if token_id:
+                day = day["per_token"].get(token_id)
+                if day is None:
+                    continue
             
-            date_key = log_date.strftime("%Y-%m-%d")
-            if date_key not in timeline:
-                timeline[date_key] = {"requests": 0, "tokens": 0}
-            
-            timeline[date_key]["requests"] += 1
-            timeline[date_key]["tokens"] += log["tokens"]
+            timeline.append({"date": date_key, "requests": day["requests"], "tokens": day["tokens"]})
         
-        return [{"date": k, **v} for k, v in sorted(timeline.items())]
+        timeline.reverse()
+        return timeline
+
+@lru_cache(maxsize=1)
+def get_db() -> DashboardDatabase:
+    """Shared database instance (created on first use; usable as a FastAPI dependency)"""
+    return DashboardDatabase(os.getenv("DB_FILE", "dashboard_data.json"))
@@ -0,0 +1,39 @@
+# modules/response_cache.py
+import functools
+import time
+
+from starlette.responses import Response
+
+
+def cached_response(ttl: float, response_class: type[Response]):
+    """
+    Cache the rendered response of an async endpoint for `ttl` seconds.
+
+    The cache is not keyed on arguments, so the endpoint may only take
+    dependencies that resolve to the same value on every request (such as the
+    database from `get_db`).
+
+    A burst of polling requests then costs one call and one serialization; the
+    rest are served the already rendered body. Call `endpoint.cache_clear()`
+    after a change that should be visible immediately.
+    """
+    def decorator(func):
+        cached: Response | None = None
+        expires_at = 0.0
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            nonlocal cached, expires_at
+            now = time.monotonic()
+            if cached is None or now >= expires_at:
+                cached = response_class(await func(*args, **kwargs))
+                expires_at = now + ttl
+            return cached
+
+        def cache_clear():
+            nonlocal cached
+            cached = None
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator